@@ -1,6 +1,6 @@
 import os
 import sys
-import csv
+from collections import OrderedDict
 import cv2
 import numpy as np
 from PyQt5.QtWidgets import (
@@ -8,8 +8,116 @@ from PyQt5.QtWidgets import (
     QFileDialog, QPushButton, QHBoxLayout, QMessageBox, QScrollArea,
     QToolBar, QStatusBar, QSlider, QGroupBox
 )
-from PyQt5.QtCore import Qt, QSize, QAbstractListModel, QPoint, QTimer, QRectF
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QColor, QPen, QIcon, QFont, QWheelEvent
+from PyQt5.QtCore import (
+    Qt, QSize, QAbstractListModel, QTimer, QRectF,
+    QObject, QRunnable, QThreadPool, pyqtSignal
+)
+from PyQt5.QtGui import (
+    QPixmap, QPixmapCache, QImage, QPainter, QColor, QPen, QIcon, QFont, QWheelEvent,
+    QPolygon, QPolygonF, QPainterPath
+)
+
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff'})
+_HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+
+
+def decode_image(image_path, max_dim=None):
+    """读取图片并构建显示用QImage，失败时返回None
+
+    原图最长边超过 max_dim 时先缩小到显示尺寸，返回值中的宽高仍为原图尺寸
+    """
+    # cv2.imread 在 Windows 上无法打开含中文等非ASCII字符的路径
+    try:
+        buf = np.fromfile(image_path, dtype=np.uint8)
+    except OSError:
+        return None
+    if buf.size == 0:
+        return None
+    img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+    if img is None:
+        return None
+    original_height, original_width = img.shape[:2]
+    if max_dim and max(original_width, original_height) > max_dim:
+        s = max_dim / max(original_width, original_height)
+        new_size = (max(1, int(original_width * s)), max(1, int(original_height * s)))
+        img = cv2.resize(img, new_size, interpolation=cv2.INTER_AREA)
+    height, width = img.shape[:2]
+    # QImage 共享数组内存，二者需一起保存
+    if _HAS_BGR888:
+        # Qt >= 5.14 直接使用BGR数据，省去通道转换
+        q_img = QImage(img.data, width, height, 3 * width, QImage.Format_BGR888)
+    else:
+        cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)
+        q_img = QImage(img.data, width, height, 3 * width, QImage.Format_RGB888)
+    return img, q_img, original_width, original_height
+
+
+def csv_quote(field):
+    """按 csv.QUOTE_MINIMAL 规则转义字段"""
+    if any(c in field for c in ',"\r\n'):
+        return '"' + field.replace('"', '""') + '"'
+    return field
+
+
+def _centroids_batch_impl(flat_xy, offsets):
+    """批量计算多边形形心，第i个多边形顶点为 flat_xy[offsets[i]:offsets[i + 1]]"""
+    n = offsets.shape[0] - 1
+    out = np.zeros((n, 2), dtype=np.float64)
+    for i in range(n):
+        start, end = offsets[i], offsets[i + 1]
+        area2 = 0.0
+        sx = 0.0
+        sy = 0.0
+        for j in range(start, end):
+            k = j + 1 if j + 1 < end else start
+            x0, y0 = flat_xy[j, 0], flat_xy[j, 1]
+            x1, y1 = flat_xy[k, 0], flat_xy[k, 1]
+            cross = x0 * y1 - x1 * y0
+            area2 += cross
+            sx += (x0 + x1) * cross
+            sy += (y0 + y1) * cross
+        if area2 != 0:
+            out[i, 0] = sx / (3 * area2)
+            out[i, 1] = sy / (3 * area2)
+    return out
+
+
+_centroids_batch = None
+
+
+def _get_centroids_batch():
+    """按需导入 numba 并编译批量形心计算，未安装 numba 时返回None"""
+    global _centroids_batch
+    if _centroids_batch is None:
+        try:
+            from numba import njit  # 导入较慢，只在真正需要时导入
+        except ImportError:  # numba 为可选依赖
+            return None
+        _centroids_batch = njit(cache=True)(_centroids_batch_impl)
+    return _centroids_batch
+
+
+# NumPy 逐个计算约 30µs/多边形（几千个约几十毫秒），而 numba 的导入与JIT编译/加载缓存
+# 需要数百毫秒且在GUI线程执行，只有多边形数量很大时批量计算才划算
+BATCH_CENTROID_MIN_POLYGONS = 5000
+
+
+class _DecoderSignals(QObject):
+    finished = pyqtSignal(str, int, object)
+
+
+class _Decoder(QRunnable):
+    """后台线程中预解码图片"""
+    def __init__(self, image_path, max_dim, signals):
+        super().__init__()
+        self.image_path = image_path
+        self.max_dim = max_dim
+        self.signals = signals
+
+    def run(self):
+        self.signals.finished.emit(
+            self.image_path, self.max_dim, decode_image(self.image_path, self.max_dim)
+        )
 
 
 class ZoomableLabel(QLabel):
@@ -23,20 +131,79 @@ class ZoomableLabel(QLabel):
         self._empty_pixmap = QPixmap(1, 1)
         self._empty_pixmap.fill(Qt.transparent)
         self._image_rect = QRectF()
+        self._has_image = False  # 是否已显示图片，避免每次事件都检查pixmap
+
+        # 叠加层画笔只创建一次
+        self._pen_edge = QPen(QColor(0, 255, 0), 2)  # Green polygon
+        self._pen_vert = QPen(QColor(255, 255, 0), 5)  # Yellow vertices
+        self._pen_centroid = QPen(QColor(255, 0, 0), 8)  # Red centroid
+        self._pen_text = QPen(Qt.white, 2)
+        self._font10 = QFont()
+        self._font10.setPointSize(10)
+
+    def paintEvent(self, event):
+        """先绘制图片，再在其上绘制多边形和形心叠加层"""
+        super().paintEvent(event)
+        tool = self.parent_tool
+        if not tool.current_polygon and not tool.current_centroid:
+            return
+        if not self._has_image:
+            return
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(self._image_rect.topLeft())
+        k = tool.scale_factor * self._zoom / 100
+
+        # Draw current polygon
+        if tool.current_polygon:
+            arr = (np.asarray(tool.current_polygon, dtype=np.float64) * k).astype(np.int32)
+            polygon = QPolygon(arr.ravel().tolist())
+            outline = QPainterPath()
+            outline.addPolygon(QPolygonF(polygon))
+            outline.closeSubpath()
+
+            painter.setPen(self._pen_edge)
+            painter.drawPath(outline)
+
+            painter.setPen(self._pen_vert)
+            painter.drawPoints(polygon)
+
+        # Draw centroid
+        if tool.current_centroid:
+            cx, cy = tool.current_centroid
+            display_cx = int(cx * k)
+            display_cy = int(cy * k)
+
+            painter.setPen(self._pen_centroid)
+            painter.drawPoint(display_cx, display_cy)
+
+            painter.setFont(self._font10)
+            painter.setPen(self._pen_text)
+            painter.drawText(
+                display_cx + 10,
+                display_cy + 5,
+                f"({cx}, {cy})"
+            )
+
+        painter.end()
 
     def wheelEvent(self, event: QWheelEvent):
+        if not self._has_image:
+            event.accept()
+            return
         zoom_in = event.angleDelta().y() > 0
         self.parent_tool.adjust_zoom(zoom_in)
         event.accept()
 
     def mousePressEvent(self, event):
-        if event.button() == Qt.LeftButton and self.pixmap() and not self.pixmap().isNull():
+        if event.button() == Qt.LeftButton and self._has_image:
             self.handle_click(event.pos())
         elif event.button() == Qt.RightButton:
             self.parent_tool.finish_polygon()
 
     def handle_click(self, pos):
-        if not self.pixmap() or self.pixmap().isNull():
+        if not self._has_image:
             return
 
         if not self._image_rect.contains(pos):
@@ -52,19 +219,31 @@ class ZoomableLabel(QLabel):
 
     def set_zoom(self, value):
         self._zoom = max(10, min(500, value))
-        self.parent_tool.update_display()
+        self.parent_tool.schedule_update_display()
 
 
 class ImageListModel(QAbstractListModel):
+    _icon = None  # 所有行共用的图标，首次使用时创建（需已存在QApplication）
+
     def __init__(self, image_files=None):
         super().__init__()
         self.image_files = image_files or []
+        self.basenames = [os.path.basename(p) for p in self.image_files]
+
+    def set_image_files(self, image_files):
+        """原地替换图片列表并通知视图刷新"""
+        self.beginResetModel()
+        self.image_files = image_files
+        self.basenames = [os.path.basename(p) for p in image_files]
+        self.endResetModel()
 
     def data(self, index, role):
         if role == Qt.DisplayRole:
-            return os.path.basename(self.image_files[index.row()])
+            return self.basenames[index.row()]
         elif role == Qt.DecorationRole:
-            return QIcon.fromTheme("image-x-generic")
+            if ImageListModel._icon is None:
+                ImageListModel._icon = QIcon.fromTheme("image-x-generic")
+            return ImageListModel._icon
 
     def rowCount(self, index):
         return len(self.image_files)
@@ -95,15 +274,48 @@ class AnnotationTool(QMainWindow):
         self.image_dir = ""
         self.image_paths = []
         self.current_index = 0
-        self.original_image = None
         self.original_width = 0
         self.original_height = 0
+        # QImage(ndarray.data, ...) 只是浅引用 numpy 缓冲区，不会复制像素。
+        # 数组与 QImage 一同保存在实例上，保证缓冲区在 QImage 整个生命周期内有效，
+        # 从而无需防御性的 .copy()
+        self._display_image = None
+        self._base_qimage = None
+        self._smooth_key = None  # 待平滑缩放的 (图片路径, 宽, 高)
+        self._shown_key = None  # 当前显示的 (图片路径, 宽, 高)
+        self._uncached_smooth = None  # 超出 QPixmapCache 容量的平滑缩放结果 (尺寸键, QPixmap)
+
+        # 预加载相邻图片
+        # 使用独立线程池：Qt 内部的图片缩放/转换会占用全局线程池并等待其完成，
+        # 若全局线程池被等待GIL的解码任务占满会造成死锁
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._img_cache = OrderedDict()  # 图片路径 -> (max_dim, decode_image 的结果)
+        self._img_cache_size = 5
+        self._pending_decodes = set()
+        self._decoder_signals = _DecoderSignals()
+        self._decoder_signals.finished.connect(self._on_image_decoded)
+
+        # 合并同一轮事件循环内的多次重绘请求
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(0)
+        self._redraw_timer.timeout.connect(self.update_display)
+
+        # 交互缩放时先快速缩放，空闲后再平滑缩放
+        self._pending_smooth = QTimer(self)
+        self._pending_smooth.setSingleShot(True)
+        self._pending_smooth.setInterval(150)
+        self._pending_smooth.timeout.connect(self._rescale_smooth)
+        self._zoom_redraw = False  # 本次重绘是否由交互缩放触发
         self.scale_factor = 1.0
         self.annotations = {}
         self.current_polygon = []
         self.current_centroid = None
         self.auto_advance = True
         self.marked_count = 0  # 已标注图片计数
+        self._files_with_marks = set()
+        self._centroids_dirty = False  # 已保存的多边形被修改、形心需重新计算
 
         # 创建UI
         self.setup_ui()
@@ -240,9 +452,7 @@ class AnnotationTool(QMainWindow):
 
     def update_marked_count(self):
         """更新已标注图片计数"""
-        total = len(self.image_paths)
-        marked = len([f for f in self.annotations.keys() if len(self.annotations[f]["centroids"]) > 0])
-        self.marked_label.setText(f"已标注: {marked}/{total}")
+        self.marked_label.setText(f"已标注: {self.marked_count}/{len(self.image_paths)}")
 
     def adjust_zoom(self, zoom_in):
         """调整缩放级别"""
@@ -268,20 +478,32 @@ class AnnotationTool(QMainWindow):
         dir_path = QFileDialog.getExistingDirectory(self, "选择图片文件夹")
         if dir_path:
             self.image_dir = dir_path
-            self.image_paths = [
-                os.path.join(dir_path, f)
-                for f in os.listdir(dir_path)
-                if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff'))
-            ]
+            with os.scandir(dir_path) as it:
+                self.image_paths = [
+                    entry.path
+                    for entry in it
+                    if entry.is_file()
+                    and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+                ]
 
             if not self.image_paths:
                 QMessageBox.warning(self, "警告", "未找到支持的图片文件！")
                 return
 
-            self.list_model = ImageListModel(self.image_paths)
-            self.list_view.setModel(self.list_model)
+            self.list_model.set_image_files(self.image_paths)
             self.current_index = 0
+            # 先释放 QImage 再释放其引用的缓冲区
+            self._base_qimage = None
+            self._display_image = None
+            self.image_label._has_image = False
+            self._smooth_key = None
+            self._shown_key = None
+            self._uncached_smooth = None
+            self._img_cache.clear()
+            self._pending_decodes.clear()
             self.annotations = {}
+            self._centroids_dirty = False
+            self._files_with_marks.clear()
             self.marked_count = 0
             self.load_current_image()
             self.update_marked_count()
@@ -290,13 +512,17 @@ class AnnotationTool(QMainWindow):
         """加载当前图片"""
         if 0 <= self.current_index < len(self.image_paths):
             image_path = self.image_paths[self.current_index]
-            img = cv2.imread(image_path)
-            if img is None:
-                QMessageBox.warning(self, "错误", f"无法加载图片: {image_path}")
-                return
-
-            self.original_image = img
-            self.original_height, self.original_width = img.shape[:2]
+            max_dim = self._display_max_dim()
+            decoded = self._get_cached_decode(image_path, max_dim)
+            if decoded is None:
+                decoded = decode_image(image_path, max_dim)
+                if decoded is None:
+                    QMessageBox.warning(self, "错误", f"无法加载图片: {image_path}")
+                    return
+                self._cache_decoded(image_path, max_dim, decoded)
+
+            # 每张图片只做一次颜色转换和QImage构建，点击坐标按原图尺寸换算
+            self._display_image, self._base_qimage, self.original_width, self.original_height = decoded
 
             # Clear current polygon and centroid when loading new image
             self.current_polygon = []
@@ -305,18 +531,79 @@ class AnnotationTool(QMainWindow):
             self.update_display()
             self.statusBar().showMessage(f"正在标注: {os.path.basename(image_path)}")
             self.update_marked_count()
+            self._prefetch_neighbors()
+
+    def _prefetch_neighbors(self):
+        """在后台线程中解码前后相邻的图片"""
+        max_dim = self._display_max_dim()
+        for index in (self.current_index + 1, self.current_index - 1):
+            if not 0 <= index < len(self.image_paths):
+                continue
+            path = self.image_paths[index]
+            if path in self._pending_decodes or self._get_cached_decode(path, max_dim) is not None:
+                continue
+            self._pending_decodes.add(path)
+            self._pool.start(_Decoder(path, max_dim, self._decoder_signals))
+
+    def _display_max_dim(self):
+        """显示用图片的最长边，取显示区域的两倍；缩放超过200%时返回0，即使用原图"""
+        if self.image_label._zoom > 200:
+            return 0
+        return 2 * max(self.image_label.width(), self.image_label.height())
+
+    def _ensure_display_resolution(self):
+        """缩放超过200%而当前显示的是缩小图时，换成原图分辨率以免放大后模糊"""
+        if self.image_label._zoom <= 200 or self._display_image.shape[1] == self.original_width:
+            return
+        image_path = self.image_paths[self.current_index]
+        decoded = self._get_cached_decode(image_path, 0)
+        if decoded is None:
+            decoded = decode_image(image_path)
+            if decoded is None:
+                return
+            self._cache_decoded(image_path, 0, decoded)
+        self._display_image, self._base_qimage = decoded[:2]
+
+    def _get_cached_decode(self, image_path, max_dim):
+        """取出解码缓存；缓存的缩小图比所需尺寸小（max_dim为0表示需要原图）时视为失效"""
+        entry = self._img_cache.get(image_path)
+        if entry is None:
+            return None
+        cached_max_dim, decoded = entry
+        img, _, original_width, original_height = decoded
+        downscaled = img.shape[1] != original_width or img.shape[0] != original_height
+        if downscaled and (max_dim == 0 or cached_max_dim < max_dim):
+            return None
+        self._img_cache.move_to_end(image_path)
+        return decoded
+
+    def _on_image_decoded(self, image_path, max_dim, decoded):
+        """接收后台解码结果（主线程）"""
+        if image_path not in self._pending_decodes:
+            return  # 文件夹已切换，丢弃过期结果
+        self._pending_decodes.discard(image_path)
+        if decoded is not None:
+            self._cache_decoded(image_path, max_dim, decoded)
+
+    def _cache_decoded(self, image_path, max_dim, decoded):
+        """写入解码缓存，超出容量时淘汰最久未用的图片"""
+        self._img_cache[image_path] = (max_dim, decoded)
+        self._img_cache.move_to_end(image_path)
+        if len(self._img_cache) > self._img_cache_size:
+            self._img_cache.popitem(last=False)
+
+    def schedule_update_display(self):
+        """在事件循环空闲时更新图片显示（由缩放触发）"""
+        self._zoom_redraw = True
+        self._redraw_timer.start()
 
     def update_display(self):
         """更新图片显示"""
-        if self.original_image is None:
+        if self._base_qimage is None or not self.image_paths:
             return
 
-        rgb_image = cv2.cvtColor(self.original_image, cv2.COLOR_BGR2RGB)
-        height, width, _ = rgb_image.shape
-        q_img = QImage(
-            rgb_image.data, width, height, 3 * width,
-            QImage.Format_RGB888
-        )
+        self._ensure_display_resolution()
+        width, height = self.original_width, self.original_height
 
         # Calculate the scale factor to fit the image in the label
         label_size = self.image_label.size()
@@ -330,72 +617,80 @@ class AnnotationTool(QMainWindow):
         scaled_width = int(width * self.scale_factor * zoom_factor)
         scaled_height = int(height * self.scale_factor * zoom_factor)
 
-        scaled_pixmap = QPixmap.fromImage(q_img).scaled(
-            scaled_width,
-            scaled_height,
-            Qt.KeepAspectRatio,
-            Qt.SmoothTransformation
-        )
+        # 缩放结果按尺寸缓存在 QPixmapCache 中
+        size_key = (self.image_paths[self.current_index], scaled_width, scaled_height)
+        base_scaled = QPixmapCache.find(self._scaled_cache_key(size_key, Qt.SmoothTransformation))
+        if base_scaled is None and self._uncached_smooth and self._uncached_smooth[0] == size_key:
+            base_scaled = self._uncached_smooth[1]
+        zoom_redraw, self._zoom_redraw = self._zoom_redraw, False
+        if base_scaled is None and zoom_redraw:
+            # 交互缩放时先快速缩放，只有当前显示的是快速缩放结果时才安排平滑缩放
+            base_scaled = QPixmapCache.find(self._scaled_cache_key(size_key, Qt.FastTransformation))
+            if base_scaled is None:
+                base_scaled = self._scale_base_image(size_key, Qt.FastTransformation)
+            self._smooth_key = size_key
+            self._pending_smooth.start()
+        else:
+            if base_scaled is None:
+                base_scaled = self._scale_base_image(size_key, Qt.SmoothTransformation)
+            self._smooth_key = None
+            self._pending_smooth.stop()
+        self._shown_key = size_key
 
         # Calculate the actual displayed image rectangle
         offset_x = (self.image_label.width() - scaled_width) / 2
         offset_y = (self.image_label.height() - scaled_height) / 2
         self.image_label._image_rect = QRectF(offset_x, offset_y, scaled_width, scaled_height)
 
-        painter = QPainter(scaled_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-
-        # Draw current polygon
-        if self.current_polygon:
-            points = [QPoint(
-                int(x * self.scale_factor * zoom_factor),
-                int(y * self.scale_factor * zoom_factor)
-            ) for x, y in self.current_polygon]
+        self.image_label.setPixmap(base_scaled)
+        self.image_label._has_image = not base_scaled.isNull()
 
-            painter.setPen(QPen(QColor(0, 255, 0), 2))  # Green polygon
-            for i in range(len(points)):
-                painter.drawLine(points[i], points[(i + 1) % len(points)])
+    @staticmethod
+    def _scaled_cache_key(size_key, transform_mode):
+        image_path, scaled_width, scaled_height = size_key
+        quality = "smooth" if transform_mode == Qt.SmoothTransformation else "fast"
+        return f"{image_path}:{scaled_width}x{scaled_height}:{quality}"
 
-            painter.setPen(QPen(QColor(255, 255, 0), 5))  # Yellow vertices
-            for point in points:
-                painter.drawPoint(point)
-
-        # Draw centroid
-        if self.current_centroid:
-            cx, cy = self.current_centroid
-            display_cx = int(cx * self.scale_factor * zoom_factor)
-            display_cy = int(cy * self.scale_factor * zoom_factor)
-
-            painter.setPen(QPen(QColor(255, 0, 0), 8))  # Red centroid
-            painter.drawPoint(display_cx, display_cy)
-
-            font = QFont()
-            font.setPointSize(10)
-            painter.setFont(font)
-            painter.setPen(QPen(Qt.white, 2))
-            painter.drawText(
-                display_cx + 10,
-                display_cy + 5,
-                f"({cx}, {cy})"
-            )
-
-        painter.end()
-        self.image_label.setPixmap(scaled_pixmap)
+    def _scale_base_image(self, size_key, transform_mode):
+        """缩放原图并写入缓存"""
+        _, scaled_width, scaled_height = size_key
+        base_scaled = QPixmap.fromImage(self._base_qimage).scaled(
+            scaled_width,
+            scaled_height,
+            Qt.KeepAspectRatio,
+            transform_mode
+        )
+        if not QPixmapCache.insert(self._scaled_cache_key(size_key, transform_mode), base_scaled):
+            # 超出缓存容量时 insert 不会保存，平滑结果需自行持有，否则会反复重新缩放
+            if transform_mode == Qt.SmoothTransformation:
+                self._uncached_smooth = (size_key, base_scaled)
+        return base_scaled
+
+    def _rescale_smooth(self):
+        """缩放停止后用平滑缩放替换快速缩放结果"""
+        size_key = self._smooth_key
+        self._smooth_key = None
+        if self._base_qimage is None or size_key is None or size_key != self._shown_key:
+            return
+        self.image_label.setPixmap(self._scale_base_image(size_key, Qt.SmoothTransformation))
 
     def add_polygon_point(self, x, y):
         """添加多边形顶点"""
         self.current_polygon.append((x, y))
-        self.update_display()
+        self.image_label.update()
 
     def calculate_centroid(self, points):
-        """计算多边形形心"""
-        polygon = np.array(points, dtype=np.float32)
-        moments = cv2.moments(polygon)
-        if moments["m00"] == 0:
+        """计算多边形形心（鞋带公式）"""
+        p = np.asarray(points, dtype=np.float64)
+        x, y = p[:, 0], p[:, 1]
+        x1, y1 = np.roll(x, -1), np.roll(y, -1)
+        cross = x * y1 - x1 * y
+        area = 0.5 * cross.sum()
+        if area == 0:
             return (0, 0)
-        cx = int(moments["m10"] / moments["m00"])
-        cy = int(moments["m01"] / moments["m00"])
-        return (cx, cy)
+        cx = ((x + x1) * cross).sum() / (6 * area)
+        cy = ((y + y1) * cross).sum() / (6 * area)
+        return (int(cx), int(cy))
 
     def finish_polygon(self):
         """完成当前多边形标注"""
@@ -407,24 +702,51 @@ class AnnotationTool(QMainWindow):
         self.current_centroid = self.calculate_centroid(self.current_polygon)
 
         if filename not in self.annotations:
-            self.annotations[filename] = {"centroids": []}
+            self.annotations[filename] = {"centroids": [], "polygons": []}
 
         self.annotations[filename]["centroids"].append(self.current_centroid)
-        self.marked_count += 1
-        self.update_marked_count()
+        self.annotations[filename]["polygons"].append(list(self.current_polygon))
+        if filename not in self._files_with_marks:
+            self._files_with_marks.add(filename)
+            self.marked_count = len(self._files_with_marks)
+            self.update_marked_count()
 
         self.statusBar().showMessage(f"已保存形心: ({self.current_centroid[0]}, {self.current_centroid[1]})")
         self.current_polygon = []
-        self.update_display()
+        self.image_label.update()
 
         if self.auto_advance:
             QTimer.singleShot(1000, self.next_image)
 
+    def recompute_all_centroids(self):
+        """根据已保存的多边形重新计算全部形心
+
+        修改 annotations 中已保存的多边形后应将 _centroids_dirty 置为True，导出时统一重新计算
+        """
+        self._centroids_dirty = False
+        items = [data for data in self.annotations.values() if data["polygons"]]
+        polygons = [polygon for data in items for polygon in data["polygons"]]
+        centroids_batch = None
+        if len(polygons) >= BATCH_CENTROID_MIN_POLYGONS:
+            centroids_batch = _get_centroids_batch()
+        if centroids_batch is None:
+            for data in items:
+                data["centroids"] = [self.calculate_centroid(p) for p in data["polygons"]]
+            return
+
+        offsets = np.zeros(len(polygons) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in polygons], out=offsets[1:])
+        flat_xy = np.array([pt for p in polygons for pt in p], dtype=np.float64)
+        centroids = iter(centroids_batch(flat_xy, offsets).tolist())
+        for data in items:
+            data["centroids"] = [(int(cx), int(cy)) for cx, cy in
+                                 (next(centroids) for _ in data["polygons"])]
+
     def clear_current(self):
         """清除当前标注"""
         self.current_polygon = []
         self.current_centroid = None
-        self.update_display()
+        self.image_label.update()
 
     def prev_image(self):
         """切换到上一张图片"""
@@ -456,13 +778,18 @@ class AnnotationTool(QMainWindow):
         if not save_path:  # 用户取消了选择
             return
 
+        # finish_polygon 已按多边形算好形心，只有多边形被修改过才需要重新计算
+        if self._centroids_dirty:
+            self.recompute_all_centroids()
+
         try:
-            with open(save_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(["filename", "centroid_x", "centroid_y"])
+            with open(save_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+                # 与 csv.writer 默认格式一致，坐标均为整数无需转义
+                f.write("filename,centroid_x,centroid_y\r\n")
                 for filename, data in self.annotations.items():
+                    quoted_name = csv_quote(filename)
                     for cx, cy in data["centroids"]:
-                        writer.writerow([filename, cx, cy])
+                        f.write(f"{quoted_name},{cx},{cy}\r\n")
             QMessageBox.information(self, "成功", f"形心坐标已保存到：\n{save_path}")
         except Exception as e:
             QMessageBox.critical(self, "错误", f"保存失败：{str(e)}")
@@ -477,6 +804,8 @@ if __name__ == "__main__":
     font.setPointSize(10)
     app.setFont(font)
 
+    QPixmapCache.setCacheLimit(131072)  # 128 MB, 用于缓存缩放后的图片
+
     window = AnnotationTool()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file